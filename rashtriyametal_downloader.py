@@ -5,19 +5,26 @@
 # - Extract table from the PDF and append into data/RashtriyaMetal/RMIL_Table.xlsx
 # - Header written once; subsequent runs only append new circular rows (de-duplicated by pdf_url + row content)
 #
-# Deps: requests, beautifulsoup4, pdfplumber, pandas, openpyxl, (optional) camelot-py[cv]
+# Deps: requests, lxml, pdfplumber, pandas, openpyxl, (optional) xlsxwriter, (optional) camelot-py[cv]
 
 import os
 import re
-import io
+import json
 import sys
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html
+import numpy as np
 import pandas as pd
+from pandas.util import hash_pandas_object
 import pdfplumber
+from openpyxl import Workbook, load_workbook
 
 # Try Camelot if present (better tables). If not, we'll gracefully fall back.
 try:
@@ -26,6 +33,13 @@ try:
 except Exception:
     HAS_CAMELOT = False
 
+# xlsxwriter streams new workbooks to disk (constant_memory); openpyxl is the fallback.
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except Exception:
+    HAS_XLSXWRITER = False
+
 # -------------------------
 # CONFIG (repo-relative)
 # -------------------------
@@ -34,36 +48,112 @@ DATA_DIR = os.path.join(REPO_ROOT, "data", "RashtriyaMetal")
 PDF_DIR = os.path.join(DATA_DIR, "PDFs")
 EXCEL_TABLE = os.path.join(DATA_DIR, "RMIL_Table.xlsx")
 EXCEL_URL_LOG = os.path.join(DATA_DIR, "RMIL_Price_Log.xlsx")  # keeps only the last URL; also useful for audits
+STATE_DB = os.path.join(DATA_DIR, "RMIL_state.sqlite")  # dedup row keys + last processed URL
+LAST_URL_FILE = os.path.join(DATA_DIR, ".last_url")  # plaintext copy of the last URL, for the no-op fast path
+CIRCULARS_META = os.path.join(DATA_DIR, ".circulars_meta.json")  # ETag/Last-Modified of the circulars page
 
 CIRCULARS_PAGE = "https://rashtriyametal.com/price-circulars/"
+CAMELOT_PAGE_STEPS = ((1, 1), (2, 3), (4, None))  # lattice reads later pages only when earlier ones yield nothing
+DATE_SEARCH_CHARS = 2048  # circular date lives in the header
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36"
 
+# One session for the circulars page + PDF: same host, so the TLS connection is reused
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = USER_AGENT
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=2,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+))
+
+# Compiled once at import; several of these run per link / per text line
+_PDF_URL_RE = re.compile(r'(https?://[^\s"\'<>]+\.pdf)', re.I)
+_FNAME_DATE_RE = re.compile(
+    r'(?P<d>\d{2})(?P<m>\d{2})(?P<y>20\d{2})|(?P<y2>20\d{2})(?P<m2>\d{2})(?P<d2>\d{2})'
+)
+_DATE_DMY_RE = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](20\d{2})', re.I)
+_DATE_DBY_RE = re.compile(r'(\d{1,2})\s+([A-Za-z]{3,9})\s+(20\d{2})', re.I)
+_DATE_BDY_RE = re.compile(r'([A-Za-z]{3,9})\s+(\d{1,2}),\s*(20\d{2})', re.I)
+_FNAME_DDMMYYYY_RE = re.compile(r'(\d{2})(\d{2})(20\d{2})')
+_SPLIT_COLS_RE = re.compile(r'\s{2,}|\t+')
+_FILENAME_SAN_RE = re.compile(r'[^A-Za-z0-9._-]+')
+_PDF_HREF_XPATH = (
+    "//a[substring(translate(normalize-space(@href), 'PDF', 'pdf'),"
+    " string-length(normalize-space(@href)) - 3) = '.pdf']/@href"
+)
+
 
 def ensure_dirs():
     os.makedirs(PDF_DIR, exist_ok=True)
     os.makedirs(DATA_DIR, exist_ok=True)
 
 
+def _basename_of_url(u):
+    # Filename part of a URL, without query/fragment (cheaper than urlparse + basename)
+    return u.split("?", 1)[0].split("#", 1)[0].rsplit("/", 1)[-1]
+
+
+def _filename_date_key(fname):
+    """(y, m, d) ints for the first plausible ddmmyyyy / yyyymmdd date in fname, else None."""
+    for m in _FNAME_DATE_RE.finditer(fname):
+        if m.group("y"):
+            y, mo, d = int(m.group("y")), int(m.group("m")), int(m.group("d"))
+        else:
+            y, mo, d = int(m.group("y2")), int(m.group("m2")), int(m.group("d2"))
+        if 1 <= mo <= 12 and 1 <= d <= 31:
+            return (y, mo, d)
+    return None
+
+
+def read_circulars_meta():
+    try:
+        with open(CIRCULARS_META, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta if isinstance(meta, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def write_circulars_meta(meta):
+    # Always rewrite, so validators from an older page version never linger
+    with open(CIRCULARS_META, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
 def fetch_latest_pdf_url():
-    headers = {"User-Agent": USER_AGENT}
-    resp = requests.get(CIRCULARS_PAGE, headers=headers, timeout=45)
+    """
+    Returns (latest_pdf_url, page_meta). page_meta holds the page's ETag /
+    Last-Modified; main() persists it only once latest_pdf_url is logged, so
+    a 304 always maps back to a URL we already processed (LAST_URL_FILE).
+    """
+    prev_meta = read_circulars_meta()
+    cached_url = read_last_url_sentinel()
+    headers = {}
+    if cached_url:
+        if prev_meta.get("etag"):
+            headers["If-None-Match"] = prev_meta["etag"]
+        if prev_meta.get("last_modified"):
+            headers["If-Modified-Since"] = prev_meta["last_modified"]
+
+    resp = SESSION.get(CIRCULARS_PAGE, headers=headers, timeout=45)
+    if resp.status_code == 304:
+        print("[INFO] Circulars page not modified since last run.")
+        return cached_url, prev_meta
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+    page_meta = {}
+    if resp.headers.get("ETag"):
+        page_meta["etag"] = resp.headers["ETag"]
+    if resp.headers.get("Last-Modified"):
+        page_meta["last_modified"] = resp.headers["Last-Modified"]
+    tree = html.fromstring(resp.content)
 
-    links = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip()
-        if href.lower().endswith(".pdf"):
-            links.append(urljoin(CIRCULARS_PAGE, href))
+    # Anchors whose (trimmed) href ends in .pdf, any case -- filtered in C by lxml
+    links = [urljoin(CIRCULARS_PAGE, href.strip()) for href in tree.xpath(_PDF_HREF_XPATH)]
 
     if not links:
-        # Look for URLs embedded in onclick/data-href
-        for tag in soup.find_all():
-            for attr in ("data-href", "onclick"):
-                val = tag.get(attr) or ""
-                m = re.search(r'(https?://[^\s"\'<>]+\.pdf)', val, flags=re.I)
-                if m:
-                    links.append(m.group(1))
+        # Look for URLs embedded in onclick/data-href: scan the raw HTML, no tree walk
+        links = _PDF_URL_RE.findall(resp.text)
 
     if not links:
         raise RuntimeError("No PDF links found on the circulars page.")
@@ -71,78 +161,190 @@ def fetch_latest_pdf_url():
     # Prefer the one with the latest date in filename (e.g., rmil16102025...)
     dated = []
     for u in links:
-        fname = os.path.basename(urlparse(u).path)
-        m = (re.search(r'(\d{2})(\d{2})(\d{4})', fname) or
-             re.search(r'(20\d{2})(\d{2})(\d{2})', fname))
-        if m:
-            try:
-                if len(m.groups()) == 3 and len(m.group(1)) == 4:
-                    d = datetime.strptime("".join(m.groups()), "%Y%m%d")
-                else:
-                    d = datetime.strptime("".join(m.groups()), "%d%m%Y")
-                dated.append((d, u))
-            except Exception:
-                pass
+        key = _filename_date_key(_basename_of_url(u))
+        if key:
+            dated.append((key, u))
     if dated:
-        dated.sort(key=lambda x: x[0], reverse=True)
-        return dated[0][1]
+        return max(dated, key=lambda x: x[0])[1], page_meta
 
     # Fallback: first link on the page
-    return links[0]
+    return links[0], page_meta
 
 
-def read_last_logged_url():
+def open_state_db():
+    con = sqlite3.connect(STATE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS rows("
+        "pdf_url TEXT, row_key TEXT, PRIMARY KEY(pdf_url, row_key))"
+    )
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS meta("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), url TEXT)"
+    )
+    return con
+
+
+def _read_last_url_from_excel():
+    # Runs from before the state DB existed only have the Excel log
     if not os.path.exists(EXCEL_URL_LOG):
         return None
     try:
-        df = pd.read_excel(EXCEL_URL_LOG)
-        if "pdf_url" in df.columns and not df["pdf_url"].empty:
-            return str(df["pdf_url"].iloc[-1])
+        # read_only streams the sheet; only the header and the pdf_url column are touched
+        wb = load_workbook(EXCEL_URL_LOG, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            if "pdf_url" not in header:
+                return None
+            col = header.index("pdf_url") + 1
+            last = None
+            for (v,) in ws.iter_rows(min_row=2, min_col=col, max_col=col, values_only=True):
+                if v is not None:
+                    last = v
+            return str(last) if last is not None else None
+        finally:
+            wb.close()
     except Exception:
         pass
     return None
 
 
+def read_last_logged_url():
+    con = open_state_db()
+    try:
+        row = con.execute("SELECT url FROM meta WHERE id = 1").fetchone()
+    finally:
+        con.close()
+    if row and row[0]:
+        return row[0]
+    return _read_last_url_from_excel()
+
+
+def read_last_url_sentinel():
+    try:
+        with open(LAST_URL_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_last_url_sentinel(pdf_url):
+    with open(LAST_URL_FILE, "w", encoding="utf-8") as f:
+        f.write(pdf_url + "\n")
+
+
 def write_url_log(pdf_url, local_pdf, circular_date):
     cols = ["timestamp", "circular_date", "pdf_url", "local_pdf"]
-    new_row = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "circular_date": circular_date or "",
-        "pdf_url": pdf_url,
-        "local_pdf": local_pdf,
-    }
-    if os.path.exists(EXCEL_URL_LOG):
-        df = pd.read_excel(EXCEL_URL_LOG)
-        for c in cols:
-            if c not in df.columns:
-                df[c] = None
-        df = pd.concat([df, pd.DataFrame([new_row], columns=cols)], ignore_index=True)
-    else:
-        df = pd.DataFrame([new_row], columns=cols)
-    df.to_excel(EXCEL_URL_LOG, index=False)
+    new_row = [
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        circular_date or "",
+        pdf_url,
+        local_pdf,
+    ]
+    append_rows_openpyxl(EXCEL_URL_LOG, cols, [new_row])
+
+    con = open_state_db()
+    try:
+        with con:
+            con.execute("INSERT OR REPLACE INTO meta(id, url) VALUES (1, ?)", (pdf_url,))
+    finally:
+        con.close()
+
+
+def _cell_value(v):
+    # openpyxl writes NaN literally; pandas.to_excel used to leave those cells blank
+    try:
+        return None if pd.isna(v) else v
+    except (TypeError, ValueError):
+        return v
+
+
+def _write_new_xlsx(path, header, rows):
+    # xlsxwriter cannot append, so it is only used when creating the file
+    if HAS_XLSXWRITER:
+        # strings_to_urls off: pdf_url must stay plain text, like openpyxl-appended rows
+        wb = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_urls": False})
+        ws = wb.add_worksheet()
+        ws.write_row(0, 0, list(header))
+        for i, r in enumerate(rows, start=1):
+            ws.write_row(i, 0, [_cell_value(v) for v in r])
+        wb.close()
+        return
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(header))
+    for r in rows:
+        ws.append(tuple(_cell_value(v) for v in r))
+    wb.save(path)
+
+
+def append_rows_openpyxl(path, header, rows):
+    """
+    Append rows to an .xlsx without re-reading/re-writing it through pandas.
+    New file: streamed out by _write_new_xlsx (header + rows).
+    Existing file: rows are appended to the active sheet; columns are matched
+    by header name, unknown columns are added to the end of the header row.
+    """
+    if not os.path.exists(path):
+        _write_new_xlsx(path, header, rows)
+        return
+
+    wb = load_workbook(path)
+    ws = wb.active
+    existing = [str(c.value) if c.value is not None else "" for c in ws[1]]
+    while existing and existing[-1] == "":
+        existing.pop()
+    # Map each incoming column to an existing one (duplicate names matched in order)
+    positions, used = [], set()
+    for name in header:
+        pos = next((i for i, c in enumerate(existing) if c == name and i not in used), None)
+        if pos is None:
+            existing.append(name)
+            pos = len(existing) - 1
+            ws.cell(row=1, column=pos + 1, value=name)
+        used.add(pos)
+        positions.append(pos)
+    for r in rows:
+        out = [None] * len(existing)
+        for pos, v in zip(positions, r):
+            out[pos] = _cell_value(v)
+        ws.append(tuple(out))
+    wb.save(path)
 
 
 def download_pdf(pdf_url):
-    headers = {"User-Agent": USER_AGENT}
-    r = requests.get(pdf_url, headers=headers, timeout=90)
-    r.raise_for_status()
-    fname = os.path.basename(urlparse(pdf_url).path)
-    fname = re.sub(r'[^A-Za-z0-9._-]+', '_', fname)
+    fname = _basename_of_url(pdf_url)
+    fname = _FILENAME_SAN_RE.sub('_', fname)
     local_path = os.path.join(PDF_DIR, fname)
-    with open(local_path, "wb") as f:
-        f.write(r.content)
+    # Stream to disk in 64 KiB chunks rather than buffering the whole PDF.
+    # Write to .part and move into place only once complete, so a dropped
+    # connection never leaves a truncated PDF in PDF_DIR (which gets committed).
+    part_path = local_path + ".part"
+    try:
+        with SESSION.get(pdf_url, stream=True, timeout=90) as r:
+            r.raise_for_status()
+            with open(part_path, "wb") as f:
+                for chunk in r.iter_content(1 << 16):
+                    f.write(chunk)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    os.replace(part_path, local_path)
     return local_path
 
 
 def extract_date_from_text(text, fallback_from_name=None):
-    # Try several date patterns inside the PDF text
-    date_candidates = []
+    # Circulars carry one date, near the top: search the header region only,
+    # patterns in priority order, first successful parse wins
+    head = text[:DATE_SEARCH_CHARS]
     for pat, fmt in [
-        (r'(\d{1,2})[/-](\d{1,2})[/-](20\d{2})', "%d-%m-%Y"),
-        (r'(\d{1,2})\s+([A-Za-z]{3,9})\s+(20\d{2})', "%d %b %Y"),
-        (r'([A-Za-z]{3,9})\s+(\d{1,2}),\s*(20\d{2})', "%b %d, %Y"),
+        (_DATE_DMY_RE, "%d-%m-%Y"),
+        (_DATE_DBY_RE, "%d %b %Y"),
+        (_DATE_BDY_RE, "%b %d, %Y"),
     ]:
-        m = re.search(pat, text, flags=re.I)
+        m = pat.search(head)
         if m:
             try:
                 if fmt == "%d-%m-%Y":
@@ -151,15 +353,13 @@ def extract_date_from_text(text, fallback_from_name=None):
                     d = datetime.strptime(f"{m.group(1)} {m.group(2)} {m.group(3)}", fmt)
                 else:
                     d = datetime.strptime(f"{m.group(1)} {m.group(2)}, {m.group(3)}", fmt)
-                date_candidates.append(d)
+                return d.strftime("%Y-%m-%d")
             except Exception:
                 pass
-    if date_candidates:
-        return max(date_candidates).strftime("%Y-%m-%d")
 
     # fallback: from filename like ddmmyyyy
     if fallback_from_name:
-        m = re.search(r'(\d{2})(\d{2})(20\d{2})', fallback_from_name)
+        m = _FNAME_DDMMYYYY_RE.search(fallback_from_name)
         if m:
             try:
                 d = datetime.strptime("".join(m.groups()), "%d%m%Y")
@@ -169,28 +369,57 @@ def extract_date_from_text(text, fallback_from_name=None):
     return ""
 
 
-def read_pdf_text(local_pdf_path):
-    with open(local_pdf_path, "rb") as f:
-        raw = f.read()
+def parse_pdf_once(local_pdf_path):
+    """
+    Single pdfplumber pass over the PDF (layout analysis is the expensive part).
+    Returns (full_text, fallback_rows) where fallback_rows are the lines split
+    into 'columns' on multiple spaces/tabs, for fallback_extract_table_with_pdfplumber.
+    """
     text_all = []
-    with pdfplumber.open(io.BytesIO(raw)) as pdf:
+    rows = []
+    with pdfplumber.open(local_pdf_path) as pdf:
         for page in pdf.pages:
             t = page.extract_text() or ""
             text_all.append(t)
-    return "\n".join(text_all)
+            for line in t.splitlines():
+                # split on 2+ spaces or tabs
+                parts = _SPLIT_COLS_RE.split(line.strip())
+                if len(parts) > 1:
+                    rows.append(parts)
+    return "\n".join(text_all), rows
+
+
+def _camelot_page_ranges(n_pages):
+    # CAMELOT_PAGE_STEPS clipped to the document; steps past the last page are dropped
+    for start, end in CAMELOT_PAGE_STEPS:
+        if start > n_pages:
+            break
+        end = n_pages if end is None else min(end, n_pages)
+        yield str(start) if start == end else f"{start}-{end}"
 
 
 def try_extract_tables_with_camelot(local_pdf_path):
     """
-    Returns a DataFrame by concatenating all detected tables (first few pages),
-    or None if Camelot isn't available or found nothing.
+    Returns a DataFrame by concatenating all detected tables, or None if
+    Camelot isn't available or found nothing. Lattice is tried over widening
+    page ranges (CAMELOT_PAGE_STEPS) and stops at the first that has tables;
+    stream runs over the whole document only if lattice found nothing.
     """
     if not HAS_CAMELOT:
         return None
     try:
+        with pdfplumber.open(local_pdf_path) as pdf:
+            n_pages = len(pdf.pages)
+
         # lattice works on ruled tables, stream on whitespace-separated
-        tables_lattice = camelot.read_pdf(local_pdf_path, pages='1-end', flavor='lattice')
-        dfs = [t.df for t in tables_lattice] if tables_lattice else []
+        dfs = []
+        for pages in _camelot_page_ranges(n_pages):
+            # process_background: skip background-line raster work we don't need
+            tables = camelot.read_pdf(local_pdf_path, pages=pages, flavor='lattice',
+                                      process_background=False)
+            dfs = [t.df for t in tables] if tables else []
+            if dfs:
+                break
         if not dfs:
             tables_stream = camelot.read_pdf(local_pdf_path, pages='1-end', flavor='stream')
             dfs = [t.df for t in tables_stream] if tables_stream else []
@@ -212,50 +441,80 @@ def try_extract_tables_with_camelot(local_pdf_path):
         return None
 
 
-def fallback_extract_table_with_pdfplumber(local_pdf_path):
+def fallback_extract_table_with_pdfplumber(rows):
     """
-    Very simple fallback: split lines into 'columns' on multiple spaces/tabs.
+    Very simple fallback: rows are text lines already split into 'columns'
+    on multiple spaces/tabs (see parse_pdf_once).
     This is heuristic — good enough to ensure something is captured.
     """
-    rows = []
-    with pdfplumber.open(local_pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for line in text.splitlines():
-                # split on 2+ spaces or tabs
-                parts = re.split(r'\s{2,}|\t+', line.strip())
-                if len(parts) > 1:
-                    rows.append(parts)
-
     if not rows:
         return None
 
-    # Infer header from the longest row near the top
-    header = max(rows[:10], key=len) if rows else []
-    df = pd.DataFrame(rows)
-    df.columns = [f"col_{i+1}" for i in range(df.shape[1])]
-    # Try to promote header row if shapes match
-    for r in rows[:10]:
-        if len(r) == df.shape[1]:
-            header = [h.strip() for h in r]
-            df.columns = header
-            # drop the first matching header row occurrence
-            first_idx = df.index[(df.iloc[:, 0] == r[0])].tolist()
-            if first_idx:
-                df = df.drop(index=first_idx[0])
-            break
+    ncols = max(len(r) for r in rows)
+    # Header = first row near the top that spans every column; found before
+    # building the frame so pandas doesn't have to search/drop it afterwards
+    header_row_idx = next((i for i, r in enumerate(rows[:10]) if len(r) == ncols), None)
+    if header_row_idx is None:
+        header = [f"col_{i+1}" for i in range(ncols)]
+        body = rows
+    else:
+        header = [h.strip() for h in rows[header_row_idx]]
+        body = rows[:header_row_idx] + rows[header_row_idx + 1:]
 
-    df = df.reset_index(drop=True)
-    # Clean empty columns
-    df = df.dropna(how='all', axis=1)
-    return df
+    # Pad short rows so the frame is built once with the final columns
+    body = [r + [None] * (ncols - len(r)) for r in body]
+    return pd.DataFrame(body, columns=header)
+
+
+def _row_keys(df):
+    """
+    Dedup key per row: 64-bit hashes of "column<US>value" for every non-empty
+    cell, summed (so column order and columns a row doesn't have don't matter).
+    A freshly extracted row and the same row read back from RMIL_Table.xlsx --
+    where it sits among other circulars' columns and '' came back as blank --
+    get the same key. Computed column-wise, no per-row Python work.
+    """
+    norm = df.astype(object).where(df.notna(), "").astype(str)
+    acc = np.zeros(len(norm), dtype=np.uint64)
+    for i, name in enumerate(norm.columns):
+        col = norm.iloc[:, i]
+        h = hash_pandas_object(f"{name}\x1f" + col, index=False).values
+        acc += np.where(col.values != "", h, np.uint64(0))
+    return acc.astype(str)
+
+
+def _seed_row_keys_from_excel(con):
+    # The rows table starts empty when the state DB is new; the workbook
+    # written before it existed is the only record of what was appended.
+    if not os.path.exists(EXCEL_TABLE):
+        return
+    wb = load_workbook(EXCEL_TABLE, read_only=True, data_only=True)
+    try:
+        it = wb.active.iter_rows(values_only=True)
+        header = [str(c) if c is not None else "" for c in next(it, ())]
+        body = [list(r[:len(header)]) + [None] * (len(header) - len(r)) for r in it]
+    finally:
+        wb.close()
+    if "pdf_url" not in header or not body:
+        return
+    # Unique positional labels (header can repeat); object dtype so a numeric
+    # column with blanks isn't widened to float ("0" -> "0.0")
+    df_old = pd.DataFrame(body, columns=range(len(header)), dtype=object)
+    df_old = df_old.dropna(how="all")
+    keys = _row_keys(df_old.set_axis(header, axis=1))
+    urls = df_old.iloc[:, header.index("pdf_url")].astype(str)
+    con.executemany(
+        "INSERT OR IGNORE INTO rows(pdf_url, row_key) VALUES (?, ?)",
+        zip(urls, keys),
+    )
 
 
 def append_table_to_excel(df_new, pdf_url, circular_date):
     """
     Write once (headers) and append on new circulars.
     We also store 'pdf_url' and 'circular_date' columns for traceability.
-    De-duplicate on (pdf_url + full row string).
+    De-duplicate on (pdf_url + hash of the row's non-empty cells); keys live in
+    STATE_DB, seeded once from the existing workbook when the store is new.
     """
     if df_new is None or df_new.empty:
         print("[WARN] No table detected to append.")
@@ -266,27 +525,31 @@ def append_table_to_excel(df_new, pdf_url, circular_date):
     df_new.insert(0, "circular_date", circular_date or "")
     df_new.insert(1, "pdf_url", pdf_url)
 
-    # Dedup key column (string of all cells)
-    df_new["_row_key"] = df_new.astype(str).agg("|".join, axis=1)
-
-    if os.path.exists(EXCEL_TABLE):
-        df_old = pd.read_excel(EXCEL_TABLE)
-        if "_row_key" not in df_old.columns:
-            df_old["_row_key"] = df_old.astype(str).agg("|".join, axis=1)
-        combo = pd.concat([df_old, df_new], ignore_index=True)
-        combo = combo.drop_duplicates(subset=["pdf_url", "_row_key"])
-        # Keep columns order: put metadata first
-        meta_cols = [c for c in ["circular_date", "pdf_url"] if c in combo.columns]
-        other_cols = [c for c in combo.columns if c not in meta_cols + ["_row_key"]]
-        combo = combo[meta_cols + other_cols]
-        combo.to_excel(EXCEL_TABLE, index=False)
-    else:
-        # First time: just save with headers
-        # Keep the metadata columns at front
-        meta_cols = ["circular_date", "pdf_url"]
-        other_cols = [c for c in df_new.columns if c not in meta_cols + ["_row_key"]]
-        out = df_new[meta_cols + other_cols].copy()
-        out.to_excel(EXCEL_TABLE, index=False)
+    row_keys = _row_keys(df_new)
+
+    header = [str(c) for c in df_new.columns]
+    rows = []
+    con = open_state_db()
+    try:
+        with con:
+            if con.execute("SELECT 1 FROM rows LIMIT 1").fetchone() is None:
+                _seed_row_keys_from_excel(con)
+            known = [k for (k,) in con.execute(
+                "SELECT row_key FROM rows WHERE pdf_url = ?", (pdf_url,))]
+            fresh = ~np.isin(row_keys, known) & ~pd.Series(row_keys).duplicated().values
+            if fresh.any():
+                con.executemany(
+                    "INSERT OR IGNORE INTO rows(pdf_url, row_key) VALUES (?, ?)",
+                    [(pdf_url, k) for k in row_keys[fresh]],
+                )
+                rows = list(df_new[fresh].itertuples(index=False, name=None))
+                append_rows_openpyxl(EXCEL_TABLE, header, rows)
+    finally:
+        con.close()
+
+    if not rows:
+        print("[INFO] All extracted rows already present; nothing appended.")
+        return
 
     print(f"[SUCCESS] Table appended into: {EXCEL_TABLE}")
 
@@ -294,11 +557,19 @@ def append_table_to_excel(df_new, pdf_url, circular_date):
 def main():
     ensure_dirs()
 
-    latest_url = fetch_latest_pdf_url()
+    latest_url, page_meta = fetch_latest_pdf_url()
     print(f"[INFO] Latest PDF URL: {latest_url}")
 
+    # Cheap check first; the state DB / Excel log stays authoritative
+    if read_last_url_sentinel() == latest_url.strip():
+        write_circulars_meta(page_meta)
+        print("[INFO] Same URL as last run. Skipping download + parse.")
+        sys.exit(0)
+
     last_url = read_last_logged_url()
     if last_url and last_url.strip() == latest_url.strip():
+        write_last_url_sentinel(latest_url.strip())
+        write_circulars_meta(page_meta)
         print("[INFO] Same URL as last run. Skipping download + parse.")
         sys.exit(0)
 
@@ -306,19 +577,29 @@ def main():
     local_pdf = download_pdf(latest_url)
     print(f"[INFO] Downloaded to: {local_pdf}")
 
-    # Extract date for tagging
-    text = read_pdf_text(local_pdf)
-    circular_date = extract_date_from_text(text, os.path.basename(local_pdf))
-    print(f"[INFO] Circular date detected: {circular_date or '(not found)'}")
-
-    # Extract table(s)
-    df = None
-    if HAS_CAMELOT:
-        df = try_extract_tables_with_camelot(local_pdf)
-        if df is not None:
-            print("[INFO] Table extracted via Camelot.")
+    # Camelot and the pdfplumber pass are independent, so they run side by side
+    # (one worker each, so Ghostscript never runs twice at once). Both spend
+    # most of their time in pdfminer, which holds the GIL; only Camelot's
+    # native rendering/OpenCV work overlaps, so expect a small gain, not max().
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        camelot_future = ex.submit(try_extract_tables_with_camelot, local_pdf) if HAS_CAMELOT else None
+        # One pdfplumber pass: text for the date + line rows for the fallback table
+        pdf_future = ex.submit(parse_pdf_once, local_pdf)
+
+        text, fallback_rows = pdf_future.result()
+
+        # Extract date for tagging
+        circular_date = extract_date_from_text(text, os.path.basename(local_pdf))
+        print(f"[INFO] Circular date detected: {circular_date or '(not found)'}")
+
+        # Extract table(s)
+        df = None
+        if camelot_future is not None:
+            df = camelot_future.result()
+            if df is not None:
+                print("[INFO] Table extracted via Camelot.")
     if df is None:
-        df = fallback_extract_table_with_pdfplumber(local_pdf)
+        df = fallback_extract_table_with_pdfplumber(fallback_rows)
         if df is not None:
             print("[INFO] Table extracted via pdfplumber fallback.")
 
@@ -328,6 +609,8 @@ def main():
     # Write URL log (to prevent re-processing same circular)
     write_url_log(latest_url, local_pdf, circular_date)
     print(f"[SUCCESS] URL logged: {EXCEL_URL_LOG}")
+    write_last_url_sentinel(latest_url.strip())
+    write_circulars_meta(page_meta)
 
 
 if __name__ == "__main__":